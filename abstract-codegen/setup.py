@@ -2,7 +2,7 @@ from setuptools import setup, find_packages
 
 setup(
     name='atmfjstc-abstract-codegen',
-    version='1.1.1',
+    version='1.2.0',
 
     author_email='atmfjstc@protonmail.com',
 
@@ -10,8 +10,7 @@ setup(
     packages=find_packages(where='src'),
 
     install_requires=[
-        'atmfjstc-py-lang-utils>=1.3, <2',
-        'atmfjstc-ast>=1.4, <2',
+        'atmfjstc-ast>=1.6, <2',
         'atmfjstc-text-utils>=1.4, <2',
     ],
 
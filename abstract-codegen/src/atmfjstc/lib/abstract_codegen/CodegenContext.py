@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
 
 
@@ -10,6 +11,9 @@ class CodegenContext:
     For safety, objects of this type are immutable. To "modify" a context, you can create an altered copy by calling
     its `derive` function, similar to how one would call `replace` for a named tuple.
 
+    Contexts can be created either directly or through `CodegenContext.get`, which returns shared instances. Contexts
+    obtained through `derive` are always shared.
+
     Attributes:
         width: The number of columns available for rendering the code. The renderer will do its best to ensure that
             the code fits this width, but note that success is not guaranteed in all cases.
@@ -22,6 +26,23 @@ class CodegenContext:
     indent: int = 2
     oneliner: bool = False
 
+    def __post_init__(self):
+        # Contexts are used as keys for the render caches, so it pays to compute the hash only once
+        object.__setattr__(self, '_hash', hash((self.width, self.indent, self.oneliner)))
+
+    def __hash__(self):
+        return self._hash
+
+    @staticmethod
+    def get(width: int, indent: int = 2, oneliner: bool = False) -> 'CodegenContext':
+        """
+        Gets a context with the specified settings.
+
+        Unlike the regular constructor, this returns the same object for repeated requests with identical settings,
+        which cuts down on allocations and speeds up lookups in render caches keyed by context.
+        """
+        return _get_context(width, indent, oneliner)
+
     def derive(
         self,
         width: Optional[int] = None,
@@ -45,11 +66,15 @@ class CodegenContext:
         Returns:
             A context with the modifications performed.
         """
-        def coalesce(a, b):
-            return a if b is None else b
+        base_width = self.width if width is None else width
 
-        return CodegenContext(
-            width=coalesce(self.width, width) + add_width - sub_width - (self.indent if sub_one_indent else 0),
-            indent=coalesce(self.indent, indent),
-            oneliner=coalesce(self.oneliner, oneliner),
+        return _get_context(
+            base_width + add_width - sub_width - (self.indent if sub_one_indent else 0),
+            self.indent if indent is None else indent,
+            self.oneliner if oneliner is None else oneliner,
         )
+
+
+@lru_cache(maxsize=4096)
+def _get_context(width: int, indent: int, oneliner: bool) -> CodegenContext:
+    return CodegenContext(width=width, indent=indent, oneliner=oneliner)
@@ -1,25 +1,117 @@
-from abc import ABCMeta, abstractmethod
-from typing import Iterable
+from abc import ABCMeta
+from typing import Iterable, List, Optional
 
 from atmfjstc.lib.ast import ASTNode
 
 from atmfjstc.lib.abstract_codegen.CodegenContext import CodegenContext
 
 
+# Nodes lighter than this (by default, subtrees of fewer than 6 nodes) are cheap enough to render that memoizing their
+# renderings is not worth the memory. On nested block/list trees, memoizing any lighter nodes made no difference to the
+# rendering time, but more than doubled the number of caches kept, whereas raising the threshold to 12 already made
+# rendering ~15% slower.
+_MIN_MEMOIZED_WEIGHT = 6
+
+# The maximum number of renderings memoized per node. A full rendering of a tree typically tries up to 7 different
+# contexts for a given node, so this is enough for several renderings of the same tree at different widths, while
+# bounding the memory kept alive by trees that are rendered many times over.
+_MAX_MEMOIZED_RENDERINGS = 64
+
+
 class AbstractCodegenASTNode(ASTNode, metaclass=ABCMeta):
     """
     Base class for all AST nodes used to assemble the intermediate representation of a generated file.
     """
     AST_NODE_CONFIG = ('abstract',)
 
-    @abstractmethod
+    __slots__ = ('_render_cache', '_weight', '_min_oneline_width', '_forces_multiline', '_is_always_empty')
+
+    def _post_init(self):
+        self._weight = self._compute_weight()
+        self._render_cache = dict() if self._weight >= _MIN_MEMOIZED_WEIGHT else None
+        self._min_oneline_width = self._compute_min_oneline_width()
+        self._forces_multiline = self._compute_forces_multiline()
+        self._is_always_empty = self._compute_is_always_empty()
+
+    def _compute_weight(self) -> int:
+        """
+        Computes a rough estimate of the cost of rendering this node, used for deciding whether its renderings are
+        worth memoizing. This is called once, upon node creation.
+
+        By default, this is the number of nodes in the subtree.
+        """
+        return 1 + sum(child._weight for child in self.iter_children())
+
+    @property
+    def min_oneline_width(self) -> int:
+        """
+        A lower bound for the length of the line produced by this node whenever it renders as a single line, in any
+        context.
+
+        This allows parents to quickly reject oneliner renderings that cannot possibly fit, without rendering the
+        subtree. Note that nodes that may render as nothing (or as an empty line) always have a minimum width of 0.
+        """
+        return self._min_oneline_width
+
+    def _compute_min_oneline_width(self) -> int:
+        """
+        Computes the value for `min_oneline_width`. This is called once, upon node creation.
+
+        The default is the trivial bound, 0. Node types can override this to provide a tighter bound, usually based on
+        the bounds for their children (which will have already been computed).
+        """
+        return 0
+
+    @property
+    def forces_multiline(self) -> bool:
+        """
+        True if this node is known to always render as at least two lines, in any context.
+
+        Like `min_oneline_width`, this allows parents to skip oneliner renderings that are bound to fail. Note that a
+        value of False does not guarantee that a single-line rendering is possible.
+        """
+        return self._forces_multiline
+
+    def _compute_forces_multiline(self) -> bool:
+        """
+        Computes the value for `forces_multiline`. This is called once, upon node creation, after
+        `_compute_min_oneline_width`.
+
+        The default is False, i.e. no guarantees.
+        """
+        return False
+
+    @property
+    def is_always_empty(self) -> bool:
+        """
+        True if this node is known to never produce any lines, in any context.
+
+        This allows parents to skip such nodes without rendering them. Note that a value of False does not guarantee
+        that the node is non-empty.
+        """
+        return self._is_always_empty
+
+    def _compute_is_always_empty(self) -> bool:
+        """
+        Computes the value for `is_always_empty`. This is called once, upon node creation.
+
+        The default is False, i.e. no guarantees.
+        """
+        return False
+
     def render(self, context: CodegenContext) -> Iterable[str]:
         """
         Renders this node (i.e. converts it to text) within a given context (width, indent size etc.)
 
-        Note that the rendering is done line-by-line and, where possible, in a lazy manner. It is possible, in
-        principle, to stop midway through reading the lines and not have the renderer do the work for the rest, if
-        we have already got what we need.
+        Note that renderings are memoized per node and context (except for very light nodes). Since parent nodes
+        frequently try several renderings of the same child (e.g. first as a oneliner, then splayed), this prevents the
+        work from growing exponentially with the depth of the tree. The memoized renderings live as long as the node
+        itself, up to a fixed number per node, after which further renderings are simply not memoized. Thus, it is best
+        not to keep trees around after they are no longer needed.
+
+        New node types should implement `_render` so as to benefit from memoization. Overriding `render` directly, as
+        node types written for previous versions do, is still supported: parent nodes will use the override, but its
+        results will not be memoized.
 
         Args:
             context: A CodegenContext object containing the available width, indent size etc.
@@ -27,7 +119,58 @@ class AbstractCodegenASTNode(ASTNode, metaclass=ABCMeta):
         Returns:
             The generated text for this node, as a stream of lines. The lines are not newline-terminated.
         """
-        raise NotImplementedError
+        return iter(self._render_list(context))
+
+    def _render_list(self, context: CodegenContext) -> List[str]:
+        """
+        Like `render`, but returns the memoized list of lines directly. For use by parent nodes, which must take care
+        not to modify the list.
+        """
+        if self._render_cache is None:
+            return _as_list(self._render(context))
+
+        lines = self._render_cache.get(context)
+        if lines is None:
+            lines = self._memoize_rendering(context, _as_list(self._render(context)))
+
+        return lines
+
+    def _memoize_rendering(self, key, lines: List[str]) -> List[str]:
+        """
+        Stores a rendering in this node's render cache under the given key, unless the cache is full. Returns the lines.
+        """
+        if len(self._render_cache) < _MAX_MEMOIZED_RENDERINGS:
+            self._render_cache[key] = lines
+
+        return lines
+
+    def render_single_line(self, context: CodegenContext) -> Optional[str]:
+        """
+        A fast path for nodes that know they render as a single line in a given context, and can produce that line
+        more cheaply than through `render`.
+
+        Args:
+            context: A CodegenContext object containing the available width, indent size etc.
+
+        Returns:
+            The line this node renders to, or None if the fast path is not available. Note that in the latter case, the
+            node may still render as a single line; use `render` to find out.
+        """
+        return None
+
+    def _render(self, context: CodegenContext) -> Iterable[str]:
+        """
+        Implements the actual rendering for this node type. See `render` for details.
+
+        Only `_render_list` should call this directly, so that results are memoized. The lines can be returned as any
+        iterable, but returning a (new) list is preferable as it will be stored as-is, without copying.
+
+        The default implementation defers to `render`, for node types that override it instead.
+        """
+        if type(self).render is AbstractCodegenASTNode.render:
+            raise NotImplementedError("Must implement either _render or render")
+
+        return self.render(context)
 
 
 class PromptableNode(AbstractCodegenASTNode):
@@ -46,15 +189,25 @@ class PromptableNode(AbstractCodegenASTNode):
     """
     AST_NODE_CONFIG = ('abstract',)
 
+    __slots__ = ()
+
     def render(self, context):
         return self.render_promptable(context, 0, 0)
 
-    @abstractmethod
+    def _render_list(self, context):
+        return self._render_promptable_list(context, 0, 0)
+
+    def _render(self, context):
+        return self._render_promptable(context, 0, 0)
+
     def render_promptable(self, context: CodegenContext, prompt_width: int, tail_width: int) -> Iterable[str]:
         """
         The `render` method as extended for "promptable" nodes. It takes two extra parameters corresponding to the more
         complicated rendering context.
 
+        Renderings are memoized just like for `render`, and the same notes apply regarding overriding this method
+        versus implementing `_render_promptable`.
+
         Args:
             context: A CodegenContext object containing the available width, indent size etc.
             prompt_width: The number of columns unavailable at the start of the first (or only) line
@@ -63,4 +216,35 @@ class PromptableNode(AbstractCodegenASTNode):
         Returns:
             The generated text for this node, as a stream of lines. The lines are not newline-terminated.
         """
-        raise NotImplementedError
+        return iter(self._render_promptable_list(context, prompt_width, tail_width))
+
+    def _render_promptable_list(self, context: CodegenContext, prompt_width: int, tail_width: int) -> List[str]:
+        """
+        Like `render_promptable`, but returns the memoized list of lines directly. The same notes apply as for
+        `_render_list`.
+        """
+        if self._render_cache is None:
+            return _as_list(self._render_promptable(context, prompt_width, tail_width))
+
+        key = (context, prompt_width, tail_width)
+
+        lines = self._render_cache.get(key)
+        if lines is None:
+            lines = self._memoize_rendering(key, _as_list(self._render_promptable(context, prompt_width, tail_width)))
+
+        return lines
+
+    def _render_promptable(self, context: CodegenContext, prompt_width: int, tail_width: int) -> Iterable[str]:
+        """
+        Implements the actual promptable rendering for this node type. See `render_promptable` for details.
+
+        The same notes apply as for `_render`.
+        """
+        if type(self).render_promptable is PromptableNode.render_promptable:
+            raise NotImplementedError("Must implement either _render_promptable or render_promptable")
+
+        return self.render_promptable(context, prompt_width, tail_width)
+
+
+def _as_list(lines: Iterable[str]) -> List[str]:
+    return lines if isinstance(lines, list) else list(lines)
@@ -1,16 +1,17 @@
-import itertools
-
 from typing import Iterable, Optional
 
-from atmfjstc.lib.py_lang_utils.iteration import iter_with_first_last, iter_with_last
 from atmfjstc.lib.text_utils import check_single_line
 
 from atmfjstc.lib.abstract_codegen.CodegenContext import CodegenContext
-from atmfjstc.lib.abstract_codegen.ast.base import AbstractCodegenASTNode, PromptableNode
+from atmfjstc.lib.abstract_codegen.ast.base import AbstractCodegenASTNode, PromptableNode, _MAX_MEMOIZED_RENDERINGS
 from atmfjstc.lib.abstract_codegen.ast.raw import Atom
 from atmfjstc.lib.abstract_codegen.ast.structural import NullNode
 
 
+# Indent strings for common indent sizes, so that block renderings can share them instead of building new ones
+_INDENTS = {size: ' ' * size for size in range(17)}
+
+
 class BlockLike(PromptableNode):
     """
     A base for all block-like nodes. All block-likes have a head, tail, and content.
@@ -22,6 +23,16 @@ class BlockLike(PromptableNode):
         ('PARAM', 'tail', dict(type=str, check=check_single_line, default='')),
     )
 
+    __slots__ = ('_head_rstrip', '_tail_lstrip', '_head_len', '_tail_len')
+
+    def _post_init(self):
+        self._head_rstrip = self.head.rstrip()
+        self._tail_lstrip = self.tail.lstrip()
+        self._head_len = len(self.head)
+        self._tail_len = len(self.tail)
+
+        super()._post_init()
+
 
 class Block(BlockLike):
     """
@@ -57,33 +68,59 @@ class Block(BlockLike):
         ('PARAM', 'allow_oneliner', dict(type=bool, default=True)),
     )
 
-    def render_promptable(self, context: CodegenContext, prompt_width: int, tail_width: int) -> Iterable[str]:
+    __slots__ = ()
+
+    def _compute_min_oneline_width(self):
+        content_width = self.content.min_oneline_width
+        if content_width == 0:
+            return len(self._head_rstrip) + len(self._tail_lstrip)
+
+        # Non-empty content always results in at least two lines for the splayed rendering, so only the oneliner counts
+        return self._head_len + content_width + self._tail_len
+
+    def _compute_forces_multiline(self):
+        if self.content.forces_multiline:
+            return True
+
+        # Otherwise, only the splayed rendering can be forced, and it has at least two lines if there is any content
+        # or tail
+        return (not self.allow_oneliner) and ((self.content.min_oneline_width > 0) or (self._tail_lstrip != ''))
+
+    def _render_promptable(self, context: CodegenContext, prompt_width: int, tail_width: int) -> Iterable[str]:
         if self.allow_oneliner:
             render = self._try_render_oneliner(context, prompt_width, tail_width)
             if render is not None:
-                yield render
-                return
+                return [render]
 
-        yield self.head.rstrip()
+        lines = [self._head_rstrip]
 
-        for line in self.content.render(context.derive(sub_one_indent=True, oneliner=False)):
-            yield ' ' * context.indent + line
+        indent = _INDENTS.get(context.indent)
+        if indent is None:
+            indent = ' ' * context.indent
+        lines.extend(
+            indent + line for line in self.content._render_list(context.derive(sub_one_indent=True, oneliner=False))
+        )
 
-        if self.tail.lstrip() != '':
+        if self._tail_lstrip != '':
             # Note that we intentionally collapse an empty tail, but not an empty head
-            yield self.tail.lstrip()
+            lines.append(self._tail_lstrip)
+
+        return lines
 
     def _try_render_oneliner(self, context: CodegenContext, prompt_width: int, tail_width: int) -> Optional[str]:
-        avail_width = context.width - prompt_width - tail_width - len(self.head) - len(self.tail)
-        if avail_width < 0:
+        avail_width = context.width - prompt_width - tail_width - self._head_len - self._tail_len
+        if (avail_width < 0) or (self.content.min_oneline_width > avail_width) or self.content.forces_multiline:
             return None
 
-        content_render = list(self.content.render(context.derive(width=avail_width, oneliner=True)))
+        content_context = context.derive(width=avail_width, oneliner=True)
+
+        single_line = self.content.render_single_line(content_context)
+        content_render = [single_line] if single_line is not None else self.content._render_list(content_context)
         if len(content_render) > 1:
             return None
 
         if (len(content_render) == 0) or (content_render[0] == ''):
-            return self.head.rstrip() + self.tail.lstrip()
+            return self._head_rstrip + self._tail_lstrip
 
         if len(content_render[0]) > avail_width:
             return None
@@ -108,16 +145,28 @@ class Brace(BlockLike):
         ('CHILD', 'content', dict(type=PromptableNode)),
     )
 
-    def render_promptable(self, context: CodegenContext, prompt_width: int, tail_width: int) -> Iterable[str]:
-        for line, is_first, is_last in iter_with_first_last(
-            self.content.render_promptable(context, prompt_width + len(self.head), tail_width + len(self.tail))
-        ):
-            if is_first:
-                line = (self.head + line).rstrip()
-            if is_last:
-                line += self.tail
+    __slots__ = ()
+
+    def _compute_min_oneline_width(self):
+        # The content may end in whitespace that is stripped along with that of the head, so we don't count it
+        return (len(self._head_rstrip) + self._tail_len) if self.content.min_oneline_width > 0 else 0
+
+    def _compute_forces_multiline(self):
+        return self.content.forces_multiline
+
+    def _compute_is_always_empty(self):
+        return self.content.is_always_empty
+
+    def _render_promptable(self, context: CodegenContext, prompt_width: int, tail_width: int) -> Iterable[str]:
+        lines = list(
+            self.content.render_promptable(context, prompt_width + self._head_len, tail_width + self._tail_len)
+        )
+
+        if len(lines) > 0:
+            lines[0] = (self.head + lines[0]).rstrip()
+            lines[-1] += self.tail
 
-            yield line
+        return lines
 
 
 class ChainedBlocks(PromptableNode):
@@ -140,60 +189,105 @@ class ChainedBlocks(PromptableNode):
     """
     # Note: we set AST_NODE_CONFIG after the class definition, due to the self-reference
 
-    def render_promptable(self, context: CodegenContext, prompt_width: int, tail_width: int) -> Iterable[str]:
-        blocks, delimiters = self._consolidate()
+    __slots__ = ('_flat_items', '_blocks', '_delimiters', '_altered_blocks')
 
+    def _post_init(self):
+        self._flat_items = self._flatten_content()
+        self._blocks, self._delimiters = self._consolidate()
+        self._altered_blocks = self._precompute_altered_blocks()
+
+        super()._post_init()
+
+    def _compute_forces_multiline(self):
+        # Note that several blocks may well render on a single line, e.g. ``} else {``, and that the heads and tails of
+        # the blocks will be altered when they are chained, so we can only rely on what the block content forces.
+        return any(block.content.forces_multiline for block in self._blocks)
+
+    def _render_promptable(self, context: CodegenContext, prompt_width: int, tail_width: int) -> Iterable[str]:
+        blocks, delimiters = self._blocks, self._delimiters
+
+        lines = []
         last_line = delimiters[0]
         effective_prompt_width = 0
 
-        for block, prev_delim, next_delim in zip(blocks, delimiters[:-1], delimiters[1:]):
-            effective_block = block.alter(head=last_line, tail=next_delim)
+        for index, block in enumerate(blocks):
+            effective_block = self._get_altered_block(index, last_line)
+
+            block_lines = effective_block._render_promptable_list(context, effective_prompt_width, tail_width)
+            if len(block_lines) == 0:
+                continue
+
+            if len(block_lines) > 1:
+                lines.extend(block_lines[:-1])
+                effective_prompt_width = 0
+
+            last_line = block_lines[-1]
+
+        lines.append(last_line)
+
+        return lines
 
-            for line, is_last in iter_with_last(
-                effective_block.render_promptable(context, effective_prompt_width, tail_width)
-            ):
-                if not is_last:
-                    yield line
-                    effective_prompt_width = 0
-                else:
-                    last_line = line
+    def _precompute_altered_blocks(self):
+        # When rendering, each block gets the following delimiter as its tail, and the last line rendered so far as its
+        # head. For the first block, the latter is just the first delimiter, and for the others it is most often the
+        # previous delimiter (when the previous block is splayed), so we prepare the altered blocks for these cases in
+        # advance. Other heads depend on the rendering context, so those altered blocks are only created (and kept)
+        # as they are needed. Either way, reusing the altered blocks allows their renderings to be memoized too.
+        altered_blocks = []
 
-        yield last_line
+        for index, block in enumerate(self._blocks):
+            head = self._delimiters[index] if index == 0 else self._delimiters[index].lstrip()
+
+            altered_blocks.append({head: block.alter(head=head, tail=self._delimiters[index + 1])})
+
+        return tuple(altered_blocks)
+
+    def _get_altered_block(self, index: int, head: str) -> BlockLike:
+        altered_blocks = self._altered_blocks[index]
+
+        altered_block = altered_blocks.get(head)
+        if altered_block is None:
+            altered_block = self._blocks[index].alter(head=head, tail=self._delimiters[index + 1])
+
+            if len(altered_blocks) < _MAX_MEMOIZED_RENDERINGS:
+                altered_blocks[head] = altered_block
+
+        return altered_block
 
     def _consolidate(self):
         delimiters = []
         blocks = []
 
-        for is_delim, parts in itertools.groupby(self._iter_raw_items(), lambda item: isinstance(item, str)):
-            parts = list(parts)
+        # Consecutive strings are merged into a delimiter. Note that there is always a (possibly empty) delimiter
+        # before, after, and between blocks.
+        delimiter_parts = []
 
-            if is_delim:
-                delimiters.append(''.join(parts))
+        for item in self._flat_items:
+            if isinstance(item, str):
+                delimiter_parts.append(item)
             else:
-                assert len(parts) == 1
-                blocks.append(parts[0])
+                delimiters.append(''.join(delimiter_parts))
+                delimiter_parts.clear()
+                blocks.append(item)
 
-        assert len(delimiters) == len(blocks) + 1
+        delimiters.append(''.join(delimiter_parts))
 
         return blocks, delimiters
 
-    def _iter_raw_items(self):
-        def _iter_chain_content(content):
-            for item in content:
-                if isinstance(item, NullNode):
-                    continue
-                elif isinstance(item, Atom):
-                    yield item.content
-                elif isinstance(item, ChainedBlocks):
-                    yield from _iter_chain_content(item.content)
-                else:
-                    yield item.head
-                    yield item
-                    yield item.tail
-
-        yield ''
-        yield from _iter_chain_content(self.content)
-        yield ''
+    def _flatten_content(self):
+        flat_items = []
+
+        # Note: the content type check guarantees that anything not matched here is a NullNode, which we skip
+        for item in self.content:
+            if isinstance(item, BlockLike):
+                flat_items.extend((item.head, item, item.tail))
+            elif isinstance(item, Atom):
+                flat_items.append(item.content)
+            elif isinstance(item, ChainedBlocks):
+                # Nested chains have already flattened their own content when they were created
+                flat_items.extend(item._flat_items)
+
+        return tuple(flat_items)
 
 
 ChainedBlocks.AST_NODE_CONFIG = (
@@ -1,6 +1,6 @@
 import collections
 
-from typing import Iterable
+from typing import Iterable, List, Optional
 
 from atmfjstc.lib.text_utils import check_single_line
 
@@ -19,21 +19,43 @@ class Atom(PromptableNode):
         ('PARAM', 'content', dict(type=str, check=check_single_line)),
     )
 
-    def render_promptable(self, _context: CodegenContext, _prompt_width: int, _tail_width: int) -> Iterable[str]:
-        yield self.content
+    __slots__ = ('_lines',)
 
+    def _post_init(self):
+        super()._post_init()
 
-def _ensure_tuple(value):
-    return tuple(value) if isinstance(value, collections.abc.Iterable) else value
+        # Atoms render the same in any context, so a single rendering can be shared by all callers
+        self._lines = [self.content]
 
+    def _compute_min_oneline_width(self):
+        return len(self.content)
 
-def _check_lines_ok(lines):
-    for line in lines:
+    def _render_promptable_list(self, _context: CodegenContext, _prompt_width: int, _tail_width: int) -> List[str]:
+        return self._lines
+
+    def render_single_line(self, _context: CodegenContext) -> Optional[str]:
+        return self.content
+
+    def _render_promptable(self, _context: CodegenContext, _prompt_width: int, _tail_width: int) -> Iterable[str]:
+        return [self.content]
+
+
+def _coerce_lines(value):
+    # Validating the lines as we collect them saves a second pass over what may be a very large number of lines
+    if not isinstance(value, collections.abc.Iterable):
+        return value
+
+    lines = []
+    for line in value:
         if not isinstance(line, str):
             raise TypeError("Value must be a tuple of strings")
         if '\n' in line:
             raise ValueError("Lines should not contain newline characters")
 
+        lines.append(line)
+
+    return tuple(lines)
+
 
 class PreformattedLines(PromptableNode):
     """
@@ -43,11 +65,22 @@ class PreformattedLines(PromptableNode):
     being refactored.
     """
     AST_NODE_CONFIG = (
-        ('PARAM', 'lines', dict(coerce=_ensure_tuple, type=tuple, check=_check_lines_ok)),
+        ('PARAM', 'lines', dict(coerce=_coerce_lines, type=tuple)),
     )
 
-    def render_promptable(self, _context: CodegenContext, _prompt_width: int, _tail_width: int) -> Iterable[str]:
-        yield from self.lines
+    __slots__ = ()
+
+    def _compute_min_oneline_width(self):
+        return len(self.lines[0]) if len(self.lines) == 1 else 0
+
+    def _compute_forces_multiline(self):
+        return len(self.lines) > 1
+
+    def _compute_is_always_empty(self):
+        return len(self.lines) == 0
+
+    def _render_promptable(self, _context: CodegenContext, _prompt_width: int, _tail_width: int) -> Iterable[str]:
+        return list(self.lines)
 
 
 def pre(lines_iterable: Iterable[str]) -> PreformattedLines:
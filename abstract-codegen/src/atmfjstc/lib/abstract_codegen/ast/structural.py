@@ -1,5 +1,5 @@
 from abc import abstractmethod
-from typing import Iterable, Tuple
+from typing import Iterable, List, Tuple
 
 from atmfjstc.lib.text_utils import iter_wrap_items
 
@@ -32,28 +32,89 @@ class Sequence(AbstractCodegenASTNode):
         ('PARAM', 'items_margin', dict(type=int, default=0)),
     )
 
-    def render(self, context: CodegenContext) -> Iterable[str]:
-        filtered_sections = []
+    __slots__ = ('_flat_content', '_section_margins', '_uses_margins')
+
+    def _post_init(self):
+        super()._post_init()
+
+        self._flat_content, self._section_margins = self._flatten_content()
+        self._uses_margins = any(max(margins) > 0 for margins in self._section_margins)
+
+    def _flatten_content(self):
+        """
+        Splices the content of child sequences into this one's wherever this does not change the rendering, and also
+        resolves the (top, bottom) margins for each resulting section, so that this need not be done while rendering.
+
+        A child sequence can be spliced in if it uses the same margin for all its items as this sequence does for it.
+        """
+        default_margins = (self.items_margin, self.items_margin)
+
+        flat_content = []
+        section_margins = []
 
         for section in self.content:
-            rendering = list(section.render(context))
+            if isinstance(section, Sequence) and \
+                    all(margins == default_margins for margins in section._section_margins):
+                # Nested sequences have already flattened their own content when they were created
+                flat_content.extend(section._flat_content)
+                section_margins.extend(section._section_margins)
+            else:
+                flat_content.append(section)
+                section_margins.append(section.effective_margins if isinstance(section, Section) else default_margins)
+
+        return tuple(flat_content), tuple(section_margins)
+
+    def _compute_min_oneline_width(self):
+        # A single-line rendering can only come from one non-empty section, all others being empty
+        return min((section.min_oneline_width for section in self.content), default=0)
+
+    def _compute_forces_multiline(self):
+        if any(section.forces_multiline for section in self.content):
+            return True
+
+        # Sections with a non-zero minimum width are never empty
+        return sum(1 for section in self.content if section.min_oneline_width > 0) > 1
+
+    def _compute_is_always_empty(self):
+        return all(section.is_always_empty for section in self.content)
+
+    def _render(self, context: CodegenContext) -> Iterable[str]:
+        if not self._uses_margins:
+            # Common case (e.g. for `seq0`): no blank lines to insert, so we can just concatenate the renderings
+            lines = []
+            for section in self._flat_content:
+                if not section.is_always_empty:
+                    lines.extend(section._render_list(context))
+
+            return lines
+
+        # The non-empty renderings and the margins that apply to them are kept in parallel lists
+        renderings = []
+        margins_top = []
+        margins_bottom = []
+
+        for section, (margin_top, margin_bottom) in zip(self._flat_content, self._section_margins):
+            if section.is_always_empty:
+                continue
+
+            rendering = section._render_list(context)
             if len(rendering) == 0:
                 continue
 
-            margin_top, margin_bottom = \
-                section.effective_margins if isinstance(section, Section) else (self.items_margin, self.items_margin)
+            renderings.append(rendering)
+            margins_top.append(margin_top)
+            margins_bottom.append(margin_bottom)
 
-            filtered_sections.append((rendering, margin_top, margin_bottom))
+        if len(renderings) == 0:
+            return []
 
-        prev_margin = None
-        for rendering, margin_top, margin_bottom in filtered_sections:
-            if prev_margin is not None:
-                for _ in range(max(prev_margin, margin_top)):
-                    yield ''
+        lines = list(renderings[0])
 
-            yield from rendering
+        for index in range(1, len(renderings)):
+            lines.extend([''] * max(margins_bottom[index - 1], margins_top[index]))
+            lines.extend(renderings[index])
 
-            prev_margin = margin_bottom
+        return lines
 
 
 class Section(AbstractCodegenASTNode):
@@ -67,6 +128,8 @@ class Section(AbstractCodegenASTNode):
         ('PARAM', 'margin_bottom', dict(type=int, default=None, allow_none=True)),
     )
 
+    __slots__ = ()
+
     @property
     def effective_margins(self) -> Tuple[int, int]:
         return (
@@ -74,8 +137,17 @@ class Section(AbstractCodegenASTNode):
             self.margin if self.margin_bottom is None else self.margin_bottom
         )
 
-    def render(self, context: CodegenContext) -> Iterable[str]:
-        yield from self.content.render(context)
+    def _compute_min_oneline_width(self):
+        return self.content.min_oneline_width
+
+    def _compute_forces_multiline(self):
+        return self.content.forces_multiline
+
+    def _compute_is_always_empty(self):
+        return self.content.is_always_empty
+
+    def _render(self, context: CodegenContext) -> Iterable[str]:
+        return self.content._render_list(context)
 
 
 class NullNode(PromptableNode):
@@ -87,8 +159,17 @@ class NullNode(PromptableNode):
     """
     AST_NODE_CONFIG = ()
 
-    def render_promptable(self, _context: CodegenContext, _prompt_width: int, _tail_width: int) -> Iterable[str]:
-        yield from []
+    __slots__ = ()
+
+    def _compute_is_always_empty(self):
+        return True
+
+    def _render_promptable_list(self, _context: CodegenContext, _prompt_width: int, _tail_width: int) -> List[str]:
+        # There is no point in caching empty renderings
+        return []
+
+    def _render_promptable(self, _context: CodegenContext, _prompt_width: int, _tail_width: int) -> Iterable[str]:
+        return []
 
 
 class ItemsListBase(AbstractCodegenASTNode):
@@ -100,21 +181,33 @@ class ItemsListBase(AbstractCodegenASTNode):
         ('PARAM', 'allow_horiz_if_oneliner', dict(type=bool, default=False)),
     )
 
-    _joiner1 = None
-    _joiner2 = None
+    __slots__ = ('_joiner1', '_joiner2')
 
     def _post_init(self):
+        super()._post_init()
+
         self._joiner1, self._joiner2 = self._split_joiner()
 
-    def render(self, context: CodegenContext) -> Iterable[str]:
+    def _compute_min_oneline_width(self):
+        # If the list renders as a single line, that line contains all non-empty items
+        return sum(item.min_oneline_width for item in self.items)
+
+    def _compute_forces_multiline(self):
+        # A multiline item forces the vertical rendering
+        return any(item.forces_multiline for item in self.items)
+
+    def _compute_is_always_empty(self):
+        return all(item.is_always_empty for item in self.items)
+
+    def _render(self, context: CodegenContext) -> Iterable[str]:
         item_renders = self._prepare_item_renders(context)
 
         allow_horiz = self.allow_horiz or (context.oneliner and self.allow_horiz_if_oneliner)
 
         if allow_horiz and all(len(item_render) <= 1 for item_render in item_renders):
-            yield from self._render_horizontal(context, item_renders)
+            return self._render_horizontal(context, item_renders)
         else:
-            yield from self._render_vertical(item_renders)
+            return self._render_vertical(item_renders)
 
     @abstractmethod
     def _split_joiner(self):
@@ -123,35 +216,85 @@ class ItemsListBase(AbstractCodegenASTNode):
 
         - The part that is always added to an item (unless it is the last)
         - The part that is only added between an item and the previous one, when it is not the first in line
+
+        This is called only once, upon node creation. Rendering code should use the results, stored in `_joiner1` and
+        `_joiner2`, instead.
         """
 
     def _prepare_item_renders(self, context):
-        item_renders = [self._render_item(item, context) for item in self.items]
+        # We first guess the extreme item assuming that no item renders empty, which is by far the most common case.
+        # This way, we usually avoid rendering the extreme item twice.
+        candidate_items = [item for item in self.items if not item.is_always_empty]
+
+        guessed_extreme_index = self._get_extreme_item_index(len(candidate_items), context)
+        item_context, extreme_item_context = self._derive_item_contexts(context)
+
+        item_renders = []
+        items = []
+        rendered_extreme_index = None
 
-        # Filter out empty renders and their corresponding items
-        filtered = [(render, item) for render, item in zip(item_renders, self.items) if len(render) > 0]
-        item_renders, items = [pair[0] for pair in filtered], [pair[1] for pair in filtered]
+        for index, item in enumerate(candidate_items):
+            is_extreme = (index == guessed_extreme_index)
 
+            render = self._render_item(item, extreme_item_context if is_extreme else item_context, is_extreme)
+            if len(render) == 0:
+                continue
+
+            if is_extreme:
+                rendered_extreme_index = len(items)
+
+            item_renders.append(render)
+            items.append(item)
+
+        # If some items did render empty, the extreme item may have shifted, so we fix up the renders
         extreme_item_index = self._get_extreme_item_index(len(items), context)
-        if extreme_item_index is not None:
-            item_renders[extreme_item_index] = self._render_item(items[extreme_item_index], context, True)
+        if extreme_item_index != rendered_extreme_index:
+            if rendered_extreme_index is not None:
+                item_renders[rendered_extreme_index] = self._render_item(items[rendered_extreme_index], item_context)
+            if extreme_item_index is not None:
+                item_renders[extreme_item_index] = \
+                    self._render_item(items[extreme_item_index], extreme_item_context, True)
 
         return item_renders
 
     @abstractmethod
     def _get_extreme_item_index(self, n_items, context):
-        """Note, an item is "extreme" if the joiner/comma should not be added to it (e.g. it is the last)"""
+        """
+        Note, an item is "extreme" if the joiner/comma should not be added to it (e.g. it is the last).
+
+        The result must depend only on the number of (non-empty) items and the context.
+        """
+
+    @abstractmethod
+    def _derive_item_contexts(self, context):
+        """
+        Returns the contexts in which regular items and the extreme item, respectively, are to be rendered.
+
+        These are derived only once per rendering of the list, so as not to derive them anew for every item.
+        """
 
     @abstractmethod
-    def _render_item(self, item, context, is_extreme=False):
-        pass
+    def _render_item(self, item, item_context, is_extreme=False):
+        """
+        Renders an item along with its part of the joiner. The result may be the item's memoized rendering, so it must
+        not be modified.
+        """
 
     def _render_vertical(self, item_renders):
         for item in item_renders:
             yield from item
 
     def _render_horizontal(self, context, item_renders):
-        yield from iter_wrap_items((render[0] for render in item_renders), context.width, separator=self._joiner2)
+        item_lines = [render[0] for render in item_renders]
+
+        # Fast path for when all items fit on a single line (as is the case for any successful oneliner rendering).
+        # Note that empty items need the general path, as they are not separated from the start of the line.
+        if len(item_lines) > 0:
+            total_len = sum(len(line) for line in item_lines) + len(self._joiner2) * (len(item_lines) - 1)
+            if (total_len <= context.width) and all(line != '' for line in item_lines):
+                return [self._joiner2.join(item_lines)]
+
+        return list(iter_wrap_items(item_lines, context.width, separator=self._joiner2))
 
 
 class ItemsList(ItemsListBase):
@@ -178,6 +321,8 @@ class ItemsList(ItemsListBase):
         ('PARAM', 'trailing_comma', dict(type=bool, default=False)),
     )
 
+    __slots__ = ()
+
     def _split_joiner(self):
         joiner1 = self.joiner.rstrip()
         joiner2 = self.joiner[len(joiner1):]
@@ -187,13 +332,21 @@ class ItemsList(ItemsListBase):
     def _get_extreme_item_index(self, n_items, _context):
         return (n_items - 1) if ((n_items > 0) and not self.trailing_comma) else None
 
-    def _render_item(self, item, context, is_extreme=False):
-        render = list(item.render_promptable(context.derive(oneliner=True), 0, 0 if is_extreme else len(self._joiner1)))
+    def _derive_item_contexts(self, context):
+        item_context = context.derive(oneliner=True)
+
+        return item_context, item_context
 
-        if (len(render) > 0) and not is_extreme:
-            render[-1] += self._joiner1
+    def _render_item(self, item, item_context, is_extreme=False):
+        if is_extreme or (self._joiner1 == ''):
+            # Nothing to add to the rendering, so we can use the memoized one as-is
+            return item._render_promptable_list(item_context, 0, 0)
 
-        return render
+        render = item._render_promptable_list(item_context, 0, len(self._joiner1))
+        if len(render) == 0:
+            return render
+
+        return render[:-1] + [render[-1] + self._joiner1]
 
 
 class UnionItemsList(ItemsListBase):
@@ -224,6 +377,13 @@ class UnionItemsList(ItemsListBase):
     AST_NODE_CONFIG = (
     )
 
+    __slots__ = ('_continuation_indent',)
+
+    def _post_init(self):
+        super()._post_init()
+
+        self._continuation_indent = ' ' * len(self._joiner1)
+
     def _split_joiner(self):
         joiner1 = self.joiner.lstrip()
         joiner2 = self.joiner[:-len(joiner1)]
@@ -233,15 +393,19 @@ class UnionItemsList(ItemsListBase):
     def _get_extreme_item_index(self, n_items, context):
         return 0 if (context.oneliner and (n_items > 0)) else None
 
-    def _render_item(self, item, context, is_extreme=False):
-        joiner1, _ = self._split_joiner()
+    def _derive_item_contexts(self, context):
+        return context.derive(oneliner=True, sub_width=len(self._joiner1)), context.derive(oneliner=True)
+
+    def _render_item(self, item, item_context, is_extreme=False):
+        render = item._render_list(item_context)
 
-        render = list(item.render(context.derive(oneliner=True, sub_width=0 if is_extreme else len(joiner1))))
+        if is_extreme or (self._joiner1 == '') or (len(render) == 0):
+            # Nothing to add to the rendering, so we can use the memoized one as-is
+            return render
 
-        if (len(render) > 0) and not is_extreme:
-            render = [joiner1 + render[0], *[' ' * len(joiner1) + line for line in render[1:]]]
+        continuation_indent = self._continuation_indent
 
-        return render
+        return [self._joiner1 + render[0]] + [continuation_indent + line for line in render[1:]]
 
 
 def seq0(*items: AbstractCodegenASTNode) -> Sequence:
@@ -1,5 +1,5 @@
 from textwrap import dedent, wrap
-from typing import Iterable
+from typing import Iterable, List
 
 from atmfjstc.lib.text_utils import split_paragraphs
 
@@ -26,16 +26,42 @@ class ReflowableText(AbstractCodegenASTNode):
         ('PARAM', 'text', dict(type=str)),
     )
 
-    def render(self, context: CodegenContext) -> Iterable[str]:
+    __slots__ = ('_paragraphs',)
+
+    def _post_init(self):
+        # Splitting the text into paragraphs does not depend on the context, so we do it only once
         parts = split_paragraphs(dedent(self.text).strip("\n"), keep_separators=True)
 
-        for i in range(0, len(parts), 2):
-            if i > 0:
-                for _ in range(parts[i - 1].count('\n') - 1):
-                    yield ''
+        # Each paragraph is stored along with the number of blank lines that precede it
+        self._paragraphs = tuple(
+            ((parts[i - 1].count('\n') - 1) if i > 0 else 0, parts[i].rstrip()) for i in range(0, len(parts), 2)
+        )
+
+        super()._post_init()
+
+    def _compute_weight(self):
+        # Reflowing is much more expensive than rendering other leaf nodes, and roughly proportional to the text length
+        return len(self.text)
+
+    def _render_list(self, context: CodegenContext) -> List[str]:
+        # The rendering depends only on the width, so we memoize it by that instead of the whole context
+        if self._render_cache is None:
+            return self._render(context)
+
+        lines = self._render_cache.get(context.width)
+        if lines is None:
+            lines = self._memoize_rendering(context.width, self._render(context))
 
-            for line in wrap(parts[i].rstrip(), width=context.width):
-                yield line
+        return lines
+
+    def _render(self, context: CodegenContext) -> Iterable[str]:
+        lines = []
+
+        for blank_lines, paragraph in self._paragraphs:
+            lines.extend([''] * blank_lines)
+            lines.extend(wrap(paragraph, width=context.width))
+
+        return lines
 
 
 class WrapText(AbstractCodegenASTNode):
@@ -67,18 +93,28 @@ class WrapText(AbstractCodegenASTNode):
         ('PARAM', 'tail', dict(type=str, default='')),
     )
 
-    def render(self, context: CodegenContext) -> Iterable[str]:
-        subcontext = context.derive(sub_width=len(self.indent))
+    __slots__ = ()
+
+    def _compute_is_always_empty(self):
+        return self.content.is_always_empty
+
+    def _compute_forces_multiline(self):
+        if self.content.forces_multiline:
+            return True
 
-        first = True
+        # Content with a non-zero minimum width is never empty, so the head and/or tail will always be added
+        return (self.content.min_oneline_width > 0) and ((self.head != '') or (self.tail != ''))
 
-        for line in self.content.render(subcontext):
-            if first and (self.head != ''):
-                yield self.head
+    def _render(self, context: CodegenContext) -> Iterable[str]:
+        content_lines = self.content._render_list(context.derive(sub_width=len(self.indent)))
+        if len(content_lines) == 0:
+            return []
 
-            yield (self.indent + line).rstrip()
+        indent = self.indent
 
-            first = False
+        lines = [self.head] if self.head != '' else []
+        lines.extend([(indent + line).rstrip() for line in content_lines])
+        if self.tail != '':
+            lines.append(self.tail)
 
-        if not first and (self.tail != ''):
-            yield self.tail
+        return lines
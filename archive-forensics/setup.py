@@ -13,7 +13,6 @@ setup(
         'atmfjstc-iso-timestamp>=1.1.0, <2',
         'atmfjstc-binary-utils>=1.2.0, <2',
         'atmfjstc-os-forensics>=0.2.1, <2',
-        'atmfjstc-py-lang-utils>=1.11.0, <2',
     ],
 
     zip_safe=True,
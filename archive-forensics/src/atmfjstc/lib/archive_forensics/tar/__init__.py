@@ -17,16 +17,23 @@ class TarEntryType(IntEnum):
 
     @staticmethod
     def is_regular_file_type(value: Union['TarEntryType', int]) -> bool:
-        return value in {TarEntryType.REGULAR_FILE, TarEntryType.REGULAR_FILE_ALT}
+        return value in _REGULAR_FILE_TYPES
 
     @staticmethod
     def is_symlink_type(value: Union['TarEntryType', int]) -> bool:
-        return value in {TarEntryType.SYMLINK, TarEntryType.SYMLINK_ALT}
+        return value in _SYMLINK_TYPES
 
     @staticmethod
     def is_hardlink_type(value: Union['TarEntryType', int]) -> bool:
-        return value in {TarEntryType.HARDLINK, TarEntryType.HARDLINK_ALT}
+        return value in _HARDLINK_TYPES
 
     @staticmethod
     def is_device_type(value: Union['TarEntryType', int]) -> bool:
-        return value in {TarEntryType.CHAR_DEVICE, TarEntryType.BLOCK_DEVICE}
+        return value in _DEVICE_TYPES
+
+
+# Note: these are referenced by the methods above only when called, so it is fine that they are defined afterwards
+_REGULAR_FILE_TYPES = frozenset({TarEntryType.REGULAR_FILE, TarEntryType.REGULAR_FILE_ALT})
+_SYMLINK_TYPES = frozenset({TarEntryType.SYMLINK, TarEntryType.SYMLINK_ALT})
+_HARDLINK_TYPES = frozenset({TarEntryType.HARDLINK, TarEntryType.HARDLINK_ALT})
+_DEVICE_TYPES = frozenset({TarEntryType.CHAR_DEVICE, TarEntryType.BLOCK_DEVICE})
@@ -1,7 +1,7 @@
 from dataclasses import dataclass, field
-from typing import Dict, Optional
+from functools import lru_cache
+from typing import Dict, Mapping, Optional
 
-from atmfjstc.lib.py_lang_utils.convert_struct import make_struct_converter
 from atmfjstc.lib.iso_timestamp import iso_from_unix_time_string, ISOTimestamp
 from atmfjstc.lib.os_forensics.posix import INodeNo, PosixDeviceIDKDevTFormat
 
@@ -32,8 +32,19 @@ class TarArchiveEntryPaxHeaders:
     unhandled_headers: Dict[str, str] = field(default_factory=dict)
 
 
-def parse_tar_entry_pax_headers(raw_headers: Dict[str, str]) -> TarArchiveEntryPaxHeaders:
-    result, unhandled = _convert_entry_headers(raw_headers)
+def parse_tar_entry_pax_headers(raw_headers: Mapping[str, str]) -> TarArchiveEntryPaxHeaders:
+    result = dict()
+    unhandled = dict()
+
+    # Note: we sort the headers into handled and unhandled in a single pass
+    for header, value in raw_headers.items():
+        field_spec = _ENTRY_HEADER_FIELDS.get(header)
+        if field_spec is None:
+            unhandled[header] = value
+            continue
+
+        field_name, convert = field_spec
+        result[field_name] = convert(value) if convert is not None else value
 
     return TarArchiveEntryPaxHeaders(
         **result,
@@ -41,20 +52,22 @@ def parse_tar_entry_pax_headers(raw_headers: Dict[str, str]) -> TarArchiveEntryP
     )
 
 
-_convert_entry_headers = make_struct_converter(
-    source_type='dict',
-    dest_type='dict',
-    fields=dict(
-        complete_path=dict(src='path'),
-        mtime=dict(convert=lambda x: iso_from_unix_time_string(x)),
-        ctime=dict(convert=lambda x: iso_from_unix_time_string(x)),
-        atime=dict(convert=lambda x: iso_from_unix_time_string(x)),
-        # SCHILY.* headers are added by the `star` program by Jörg Schilling
-        inode=dict(src='SCHILY.ino', convert=INodeNo),
-        host_device_kdev=dict(src='SCHILY.dev', convert=PosixDeviceIDKDevTFormat),
-        n_links=dict(src='SCHILY.nlink', convert=int),
-        # libarchive headers
-        creation_time=dict(src='LIBARCHIVE.creationtime', convert=lambda x: iso_from_unix_time_string(x)),
-    ),
-    return_unparsed=True,
-)
+# Timestamps often repeat across the entries of an archive (e.g. files produced by the same build), so we memoize their
+# conversion
+_iso_from_unix_time_string_cached = lru_cache(maxsize=4096)(iso_from_unix_time_string)
+
+
+# Maps each supported header to the field it is stored in, and the converter (if any) applied to its value. Typical
+# entries only have a few headers, so it is cheaper to look each of them up here than to check for every known header.
+_ENTRY_HEADER_FIELDS = {
+    'path': ('complete_path', None),
+    'mtime': ('mtime', _iso_from_unix_time_string_cached),
+    'ctime': ('ctime', _iso_from_unix_time_string_cached),
+    'atime': ('atime', _iso_from_unix_time_string_cached),
+    # SCHILY.* headers are added by the `star` program by Jörg Schilling
+    'SCHILY.ino': ('inode', INodeNo),
+    'SCHILY.dev': ('host_device_kdev', PosixDeviceIDKDevTFormat),
+    'SCHILY.nlink': ('n_links', int),
+    # libarchive headers
+    'LIBARCHIVE.creationtime': ('creation_time', _iso_from_unix_time_string_cached),
+}
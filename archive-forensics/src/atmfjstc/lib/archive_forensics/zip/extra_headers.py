@@ -2,8 +2,11 @@
 Utilities for handling ZIP "extra data" fields
 """
 
+import struct
+
 from dataclasses import dataclass, replace, field
-from typing import List, Optional, Dict, Tuple, Type, TypeVar, ClassVar
+from functools import lru_cache
+from typing import List, Optional, Dict, Tuple, Type, TypeVar
 
 from atmfjstc.lib.binary_utils.BinaryReader import BinaryReader
 from atmfjstc.lib.iso_timestamp import ISOTimestamp, iso_from_unix_time
@@ -15,6 +18,17 @@ from atmfjstc.lib.os_forensics.posix import PosixUID, PosixGID, PosixDeviceID
 from atmfjstc.lib.archive_forensics.zip import decompress_now
 
 
+# Warnings shared by many headers. The tuples are immutable, so all parsed headers can share the same instances.
+_NO_WARNINGS: Tuple[str, ...] = ()
+_WARNINGS_UNKNOWN_VERSION: Tuple[str, ...] = ("Don't know how to decode this format version",)
+_WARNINGS_DECOMPRESS_FAILED: Tuple[str, ...] = ("Failed to decompress descriptor",)
+_WARNING_NOT_FULLY_CONSUMED = "Header was not fully consumed"
+
+# Entries in the same archive very often share timestamps, and the results are immutable, so we cache conversions
+_iso_from_unix_time_cached = lru_cache(maxsize=4096)(iso_from_unix_time)
+_iso_from_ntfs_time_cached = lru_cache(maxsize=4096)(iso_from_ntfs_time)
+
+
 def parse_zip_central_extra_data(field_bytes: bytes) -> List['ZipExtraHeader']:
     return _parse_zip_extra_data(field_bytes, is_local=False)
 
@@ -52,18 +66,19 @@ class ZipExtraHeader:
 
     @staticmethod
     def parse_from_tlv(header_id: int, data: bytes, is_local: bool) -> 'ZipExtraHeader':
-        reader = BinaryReader(data, big_endian=False)
-
-        header_class = ZipExtraHeader.get_header_class_for_magic(header_id)
+        header_class = _HEADER_CLASSES_BY_MAGIC.get(header_id)
         if header_class is None:
-            return ZXHUnrecognized(header_id, is_local, (), None, reader.read_remainder())
+            return ZXHUnrecognized(header_id, is_local, _NO_WARNINGS, None, data)
+
+        reader = BinaryReader(data, big_endian=False)
 
         result = header_class.parse(reader, is_local)
 
-        if not reader.eof():
+        # The reader is over an in-memory buffer we know the size of, so this is cheaper than asking it about EOF
+        if reader.tell() < len(data):
             result = replace(
                 result,
-                warnings=(*result.warnings, "Header was not fully consumed"),
+                warnings=(*result.warnings, _WARNING_NOT_FULLY_CONSUMED),
                 unconsumed_data=reader.read_remainder()
             )
 
@@ -73,14 +88,9 @@ class ZipExtraHeader:
     def parse(reader: BinaryReader, is_local: bool) -> 'ZipExtraHeader':
         raise NotImplementedError("Must override this in concrete header classes")
 
-    _cached_header_index: ClassVar[Optional[Dict[int, Type['ZipExtraHeader']]]] = None
-
     @classmethod
     def get_header_class_for_magic(cls, magic: int) -> Optional[Type['ZipExtraHeader']]:
-        if cls._cached_header_index is None:
-            cls._cached_header_index = { header_class.magic: header_class for header_class in _ALL_HEADER_CLASSES }
-
-        return cls._cached_header_index.get(magic)
+        return _HEADER_CLASSES_BY_MAGIC.get(magic)
 
 
 @dataclass(frozen=True)
@@ -111,7 +121,7 @@ class ZXHZip64(ZipExtraHeader):
         sizes = reader.read_struct(f'{n_64bit_values}Q', '64-bit sizes') if n_64bit_values > 0 else ()
         disk_start_no = reader.read_uint32('disk start no.') if (total_bytes % 8 != 0) else None
 
-        return ZXHZip64(is_local, (), None, sizes, disk_start_no)
+        return ZXHZip64(is_local, _NO_WARNINGS, None, sizes, disk_start_no)
 
 
 TagT = TypeVar('TagT', bound='NTFSInfoTag')
@@ -129,7 +139,7 @@ class ZXHPkWareNTFS(ZipExtraHeader):
         for tag in self.tags:
             if isinstance(tag, tag_type):
                 if result is not None:
-                    raise ValueError(f"Found multiple {tag_type.__class__.__name__} tags")
+                    raise ValueError(f"Found multiple {tag_type.__name__} tags")
 
                 result = tag
 
@@ -141,9 +151,11 @@ class ZXHPkWareNTFS(ZipExtraHeader):
 
         tags = tuple(NTFSInfoTag.parse(tag, value) for tag, value in reader.iter_tlv(type_bytes=2, length_bytes=2))
 
-        unhandled = set(tag.tag for tag in tags if isinstance(tag, NTFSInfoUnhandledTag))
-        warnings = (f"Unhandled tag(s) of type {', '.join(str(tag) for tag in unhandled)}",) if len(
-            unhandled) > 0 else ()
+        warnings = _NO_WARNINGS
+
+        unhandled = [tag.tag for tag in tags if isinstance(tag, NTFSInfoUnhandledTag)]
+        if len(unhandled) > 0:
+            warnings = (f"Unhandled tag(s) of type {', '.join(map(str, set(unhandled)))}",)
 
         return ZXHPkWareNTFS(is_local, warnings, None, tags, reserved)
 
@@ -158,7 +170,7 @@ class NTFSInfoTag:
 
         if tag == 1:
             return NTFSInfoTimestampsTag(*(
-                iso_from_ntfs_time(raw_time) for raw_time in reader.read_struct('QQQ', 'timestamps')
+                _iso_from_ntfs_time_cached(raw_time) for raw_time in reader.read_struct('QQQ', 'timestamps')
             ))
 
         return NTFSInfoUnhandledTag(tag, value)
@@ -200,14 +212,14 @@ class ZXHPkWareUnix(ZipExtraHeader):
         # in the special data, whereas for a link this will definitely not be the case.
 
         if (len(special_data) == 8) and (b'\x00' in special_data):
-            device = BinaryReader(special_data, big_endian=False).read_struct('II')
+            device = struct.unpack('<II', special_data)
         else:
             link_target = special_data
 
         return ZXHPkWareUnix(
-            is_local, (), None,
-            atime=iso_from_unix_time(raw_atime),
-            mtime=iso_from_unix_time(raw_mtime),
+            is_local, _NO_WARNINGS, None,
+            atime=_iso_from_unix_time_cached(raw_atime),
+            mtime=_iso_from_unix_time_cached(raw_mtime),
             uid=uid, gid=gid, device=device, link_target=link_target
         )
 
@@ -222,15 +234,15 @@ class ZXHNTSecurityDescriptor(ZipExtraHeader):
     def parse(reader: BinaryReader, is_local: bool) -> 'ZXHNTSecurityDescriptor':
         descriptor_size = reader.read_uint32('descriptor size')
         data = None
-        warnings = ()
+        warnings = _NO_WARNINGS
 
         if is_local:
             data = NTSecurityDescriptorData.parse(reader)
 
             if isinstance(data, NTSecurityDescriptorDataCompressed):
-                warnings = (f"Failed to decompress descriptor",)
+                warnings = _WARNINGS_DECOMPRESS_FAILED
             elif data.__class__ == NTSecurityDescriptorDataDecompressed:
-                warnings = (f"Don't know how to decode this format version",)
+                warnings = _WARNINGS_UNKNOWN_VERSION
 
         return ZXHNTSecurityDescriptor(is_local, warnings, None, descriptor_size, data)
 
@@ -283,11 +295,11 @@ class ZXHExtendedTimestamps(ZipExtraHeader):
     def parse(reader: BinaryReader, is_local: bool) -> 'ZXHExtendedTimestamps':
         flags = reader.read_uint8('flags')
 
-        mtime = iso_from_unix_time(reader.read_uint32('mtime')) if flags & (1 << 0) else None
-        atime = iso_from_unix_time(reader.read_uint32('atime')) if is_local and (flags & (1 << 1)) else None
-        ctime = iso_from_unix_time(reader.read_uint32('ctime')) if is_local and (flags & (1 << 2)) else None
+        mtime = _iso_from_unix_time_cached(reader.read_uint32('mtime')) if flags & (1 << 0) else None
+        atime = _iso_from_unix_time_cached(reader.read_uint32('atime')) if is_local and (flags & (1 << 1)) else None
+        ctime = _iso_from_unix_time_cached(reader.read_uint32('ctime')) if is_local and (flags & (1 << 2)) else None
 
-        return ZXHExtendedTimestamps(is_local, (), None, mtime=mtime, atime=atime, ctime=ctime)
+        return ZXHExtendedTimestamps(is_local, _NO_WARNINGS, None, mtime=mtime, atime=atime, ctime=ctime)
 
 
 @dataclass(frozen=True)
@@ -308,8 +320,8 @@ class ZXHInfoZipUnixV1(ZipExtraHeader):
             uid = gid = None
 
         return ZXHInfoZipUnixV1(
-            is_local, (), None,
-            mtime=iso_from_unix_time(raw_mtime), atime=iso_from_unix_time(raw_atime), uid=uid, gid=gid,
+            is_local, _NO_WARNINGS, None,
+            mtime=_iso_from_unix_time_cached(raw_mtime), atime=_iso_from_unix_time_cached(raw_atime), uid=uid, gid=gid,
         )
 
 
@@ -322,9 +334,9 @@ class ZXHInfoZipUnicodeComment(ZipExtraHeader):
     def parse(reader: BinaryReader, is_local: bool) -> 'ZXHInfoZipUnicodeComment':
         data = IZUnicodeCommentData.parse(reader)
 
-        warnings = ()
+        warnings = _NO_WARNINGS
         if isinstance(data, IZUnicodeCommentDataUnsupported):
-            warnings = (f"Don't know how to decode this format version",)
+            warnings = _WARNINGS_UNKNOWN_VERSION
 
         return ZXHInfoZipUnicodeComment(is_local, warnings, None, data)
 
@@ -366,9 +378,9 @@ class ZXHInfoZipUnicodePath(ZipExtraHeader):
     def parse(reader: BinaryReader, is_local: bool) -> 'ZXHInfoZipUnicodePath':
         data = IZUnicodePathData.parse(reader)
 
-        warnings = ()
+        warnings = _NO_WARNINGS
         if isinstance(data, IZUnicodePathDataUnsupported):
-            warnings = (f"Don't know how to decode this format version",)
+            warnings = _WARNINGS_UNKNOWN_VERSION
 
         return ZXHInfoZipUnicodePath(is_local, warnings, None, data)
 
@@ -414,7 +426,7 @@ class ZXHInfoZipUnixV2(ZipExtraHeader):
         else:
             uid = gid = None
 
-        return ZXHInfoZipUnixV2(is_local, (), None, uid=uid, gid=gid)
+        return ZXHInfoZipUnixV2(is_local, _NO_WARNINGS, None, uid=uid, gid=gid)
 
 
 @dataclass(frozen=True)
@@ -426,9 +438,9 @@ class ZXHInfoZipUnixV3(ZipExtraHeader):
     def parse(reader: BinaryReader, is_local: bool) -> 'ZXHInfoZipUnixV3':
         data = IZUnixV3Data.parse(reader)
 
-        warnings = ()
+        warnings = _NO_WARNINGS
         if isinstance(data, IZUnixV3DataUnsupported):
-            warnings = (f"Don't know how to decode this format version",)
+            warnings = _WARNINGS_UNKNOWN_VERSION
 
         return ZXHInfoZipUnixV3(is_local, warnings, None, data)
 
@@ -469,6 +481,10 @@ _ALL_HEADER_CLASSES : List[Type[ZipExtraHeader]] = [
     ZXHInfoZipUnicodeComment, ZXHInfoZipUnicodePath, ZXHInfoZipUnixV2, ZXHInfoZipUnixV3,
 ]
 
+_HEADER_CLASSES_BY_MAGIC: Dict[int, Type[ZipExtraHeader]] = {
+    header_class.magic: header_class for header_class in _ALL_HEADER_CLASSES
+}
+
 
 class ZipExtraFieldsError(Exception):
     pass
@@ -119,6 +119,9 @@ inherited from a parent) and whether it is abstract or not. To wit, each item in
       convert it to the accepted type if it is compatible (e.g. allowing lists for a parameter that accepts only
       tuples). Should be used sparingly.
 
+      The value returned by the coerce function is the one that gets stored in the node. For child list fields, the
+      function is applied to each child in turn.
+
       Note that unlike the other checks, the coerce function can be called with a None value if one is supplied.
 
     - `default`: Specifies a default value for this field.
@@ -157,10 +160,13 @@ class ASTNode:
     """
     AST_NODE_CONFIG = ('abstract',)
 
-    _ast_data = None
-    _locked = False
+    # Note: slots only save memory if derived classes also define them (for any private cache fields they set in
+    # _post_init, or empty otherwise). Derived classes that don't will simply get a regular __dict__ as usual.
+    __slots__ = ('_ast_data', '_locked')
 
     def __init__(self, *args, **kwargs):
+        object.__setattr__(self, '_locked', False)
+
         try:
             node_config = self.ast_node_config()
         except Exception as e:
@@ -260,13 +266,15 @@ class ASTNode:
         return [(field, self._ast_data[field.name]) for field in self.field_defs()]
 
     def __getattr__(self, name):
-        if name in self._ast_data:
+        # Guard against infinite recursion if the data slot itself has not been initialized yet
+        if (name != '_ast_data') and (name in self._ast_data):
             return self._ast_data[name]
 
         raise AttributeError(f"Attribute '{name}' not found in AST node of type {self.__class__.__name__}")
 
     def __setattr__(self, name, value):
-        if self._locked:
+        # The lock slot is not yet set if a subclass assigns attributes before calling our constructor
+        if getattr(self, '_locked', False):
             raise AttributeError(f"Attribute '{name}' cannot be set in immutable AST Node. Use alter()")
         else:
             super().__setattr__(name, value)
@@ -60,7 +60,7 @@ class ASTNodeFieldSpec(EZRepr):
 
         try:
             value = self._coerce_incoming_value(value)
-            self._check_value(value)
+            value = self._check_value(value)
         except Exception as e:
             raise TypeError(f"Invalid value provided for field '{self.name}'") from e
 
@@ -70,12 +70,15 @@ class ASTNodeFieldSpec(EZRepr):
         return value   # Do nothing by default
 
     def _check_value(self, value):
+        """
+        Checks a (possibly coerced) value and returns it in its final form, i.e. after applying the `coerce` function.
+        """
         if self.coerce is not None:
             value = self.coerce(value)
 
         if value is None:
             if self.allow_none:
-                return
+                return value
 
             raise TypeError("May not be None")
 
@@ -85,6 +88,8 @@ class ASTNodeFieldSpec(EZRepr):
             if checker(value) is False:
                 raise ValueError(f"Failed check '{checker.__name__}'")
 
+        return value
+
     def _final_typecheck(self, value):
         typecheck(value, self.allowed_type)
 
@@ -181,12 +186,16 @@ class ASTNodeChildListFieldSpec(ASTNodeChildFieldSpecBase):
         return tuple(value)
 
     def _check_value(self, value):
+        checked_children = []
+
         for child_index, child in enumerate(value):
             try:
-                super()._check_value(child)
+                checked_children.append(super()._check_value(child))
             except Exception as e:
                 raise TypeError(f"Error for child #{child_index}") from e
 
+        return tuple(checked_children)
+
 
 @dataclass(frozen=True, repr=False)
 class ASTNodeParamFieldSpec(ASTNodeFieldSpec):
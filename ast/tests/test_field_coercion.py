@@ -0,0 +1,39 @@
+from atmfjstc.lib.ast import ASTNode
+
+
+class Leaf(ASTNode):
+    AST_NODE_CONFIG = (
+        ('PARAM', 'name', dict(type=str, coerce=lambda value: str(value))),
+    )
+
+
+class Lines(ASTNode):
+    AST_NODE_CONFIG = (
+        ('PARAM', 'lines', dict(type=tuple, coerce=lambda value: tuple(value))),
+    )
+
+
+def _coerce_child(value):
+    return Leaf(value) if isinstance(value, str) else value
+
+
+class Parent(ASTNode):
+    AST_NODE_CONFIG = (
+        ('CHILD_LIST', 'children', dict(type=Leaf, coerce=_coerce_child)),
+    )
+
+
+def test_generator_param_is_stored_as_coerced_tuple():
+    node = Lines(line for line in ['a', 'b'])
+
+    assert node.lines == ('a', 'b')
+
+
+def test_coerced_param_value_is_stored():
+    assert Leaf(123).name == '123'
+
+
+def test_child_list_children_are_coerced():
+    node = Parent(['x', Leaf('y')])
+
+    assert node.children == (Leaf('x'), Leaf('y'))
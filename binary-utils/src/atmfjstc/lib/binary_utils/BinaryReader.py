@@ -5,6 +5,7 @@ binary-encoded data such as ints, strings, structures etc.
 
 import struct
 
+from functools import lru_cache
 from typing import Union, BinaryIO, Optional, AnyStr, Iterable, Tuple
 from io import BytesIO, IOBase, TextIOBase, UnsupportedOperation
 from os import SEEK_SET, SEEK_CUR
@@ -136,8 +137,16 @@ class BinaryReader:
 
         if n_bytes < 0:
             raise ValueError("The number of bytes to read cannot be negative")
+        if n_bytes == 0:
+            return b''
 
-        data = b''
+        # The first read almost always returns all the data, so we only enter the loop for short reads
+        data = self._fileobj.read(n_bytes)
+        self._bytes_read += len(data)
+
+        if len(data) == 0:
+            self._synthetic_eof = True
+            return data
 
         while len(data) < n_bytes:
             new_data = self._fileobj.read(n_bytes - len(data))
@@ -147,11 +156,7 @@ class BinaryReader:
                 break
 
             self._bytes_read += len(new_data)
-
-            if data == b'':
-                data = new_data
-            else:
-                data += new_data
+            data += new_data
 
         return data
 
@@ -200,13 +205,15 @@ class BinaryReader:
         if n_bytes == 0:
             return b''
 
-        original_pos = self.tell()
-
         data = self.read_at_most(n_bytes)
 
-        if len(data) == 0:
-            raise BinaryReaderMissingDataError(original_pos, n_bytes, meaning)
         if len(data) < n_bytes:
+            # The original position is only needed for the error, so we work it out after the fact
+            original_pos = self.tell() - len(data)
+
+            if len(data) == 0:
+                raise BinaryReaderMissingDataError(original_pos, n_bytes, meaning)
+
             raise BinaryReaderReadPastEndError(original_pos, n_bytes, len(data), meaning)
 
         return data
@@ -366,14 +373,12 @@ class BinaryReader:
 
         if struct_format == '':
             return ()
-        if struct_format[0] not in '@=<>!':
-            struct_format = ('>' if self._big_endian else '<') + struct_format
 
-        meaning = meaning or f"struct ({struct_format})"
+        compiled_struct = _compile_struct(struct_format, self._big_endian)
 
-        data = self.read_amount(struct.calcsize(struct_format), meaning)
+        data = self.read_amount(compiled_struct.size, meaning or f"struct ({compiled_struct.format})")
 
-        return struct.unpack(struct_format, data)
+        return compiled_struct.unpack(data)
 
     def maybe_read_struct(self, struct_format: str, meaning: Optional[str] = None) -> Optional[tuple]:
         """
@@ -538,17 +543,20 @@ class BinaryReader:
         """
 
         tlv_meaning = f"{f'{meaning} ' if meaning is not None else ''}TLV"
+        type_meaning = f"Type of {tlv_meaning} record"
+        length_meaning = f"Length of {tlv_meaning} record"
+        value_meaning = f"Value of {tlv_meaning} record"
 
         total_read = 0
         original_position = self.tell()
 
         while (total_size is None) or (total_read < total_size):
-            tag = self.maybe_read_fixed_size_int(type_bytes, f"Type of {tlv_meaning} record")
+            tag = self.maybe_read_fixed_size_int(type_bytes, type_meaning)
             if tag is None:
                 break
 
-            length = self.read_fixed_size_int(length_bytes, f"Length of {tlv_meaning} record")
-            value = self.read_amount(length, f"Value of {tlv_meaning} record")
+            length = self.read_fixed_size_int(length_bytes, length_meaning)
+            value = self.read_amount(length, value_meaning)
 
             total_read += type_bytes + length_bytes + length
 
@@ -701,6 +709,15 @@ class BinaryReader:
         return self.maybe_read_fixed_size_int(8, meaning or 'int64', signed=True, big_endian=big_endian)
 
 
+@lru_cache(maxsize=256)
+def _compile_struct(struct_format: str, big_endian: bool) -> struct.Struct:
+    # Structure formats are usually constants in the calling code, so it pays to only parse each of them once
+    if struct_format[0] not in '@=<>!':
+        struct_format = ('>' if big_endian else '<') + struct_format
+
+    return struct.Struct(struct_format)
+
+
 def _parse_main_input_arg(input_: Union[bytes, BinaryIO]) -> BinaryIO:
     if isinstance(input_, bytes):
         return BytesIO(input_)
@@ -297,30 +297,41 @@ def iter_wrap_items(items: Iterable[str], max_width: Optional[int], separator: s
         A stream of the resulting lines (with no terminating newlines)
     """
 
-    buffer = ''
+    # The current line is accumulated as a list of items and joined only when committed, to avoid repeatedly copying
+    # the whole line when there are many items
+    line_items = []
+    line_len = 0
+    separator_len = len(separator)
 
     for item in items:
         is_multiline = '\n' in item
 
         # Try to add to current line
         if not is_multiline:
-            candidate = buffer + ('' if buffer == '' else separator) + item
-            if (max_width is None) or (len(candidate) <= max_width):
-                buffer = candidate
+            added_len = len(item) if line_len == 0 else separator_len + len(item)
+            if (max_width is None) or (line_len + added_len <= max_width):
+                if line_len == 0:
+                    line_items = [item]
+                else:
+                    line_items.append(item)
+
+                line_len += added_len
                 continue
 
         # Commit line and start new one
-        if buffer != '':
-            yield buffer
+        if line_len > 0:
+            yield separator.join(line_items)
 
         if is_multiline:
             yield from item.splitlines(False)
-            buffer = ''
+            line_items = []
+            line_len = 0
         else:
-            buffer = item
+            line_items = [item]
+            line_len = len(item)
 
-    if buffer != '':
-        yield buffer
+    if line_len > 0:
+        yield separator.join(line_items)
 
 
 def split_paragraphs(text: str, keep_separators: bool = False) -> List[str]: